@@ -12,6 +12,7 @@ from mcp_openrouter.installer import (
     run_install,
     run_uninstall,
 )
+from mcp_openrouter.server import ensure_env
 from mcp_openrouter.server import main as serve_main
 
 
@@ -29,6 +30,7 @@ def main(argv: list[str] | None = None) -> int:
     """Dispatch the CLI."""
     parser = build_parser()
     args = parser.parse_args(argv)
+    ensure_env()
 
     if args.command in {None, "serve"}:
         serve_main()
@@ -1,11 +1,155 @@
 """OpenRouter API client."""
 
-import base64
+import asyncio
+import binascii
+import contextlib
+import itertools
+import random
+import re
 import sys
+import threading
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from typing import BinaryIO, Callable, Container, Iterable, Iterator
+
+import httpx
+import orjson
+
+_RETRYABLE_CODES = frozenset({408, 429, 500, 502, 503, 504})
+_ERROR_MESSAGES = {
+    400: "Bad request - check parameters",
+    401: "Invalid API key - check OPENROUTER_API_KEY",
+    402: "Insufficient credits - add funds at openrouter.ai",
+    403: "Content flagged by moderation",
+    404: "Not found - check the model or endpoint",
+    429: "Rate limited - wait before retrying",
+}
+
+# The "url" of an image_url object holding a base64 data URL. The quotes are
+# unescaped, so the same text inside a JSON string (e.g. message content)
+# cannot match; "/" may arrive JSON-escaped as "\/".
+_IMAGE_DATA_URL = re.compile(
+    rb'"image_url"\s*:\s*\{[^{}]{0,256}?"url"\s*:\s*"data:image\\?/([\w.+-]+);base64,'
+)
+# Bytes kept between chunks while looking for the header, so a header split
+# across chunks is still found.
+_HEADER_LOOKBACK = 512
+# Keeps async client shutdowns scheduled by close() alive until they finish.
+_closing_tasks: set[asyncio.Task] = set()
+# Base64 characters decoded per write; a multiple of 4 so slices stay aligned.
+_DECODE_CHUNK = 64 * 1024
+
+_CAPABILITY_FILTERS: dict[str, Callable[[dict], bool]] = {
+    "vision": lambda m: "image" in m.get("input_modalities", ()),
+    "image_gen": lambda m: "image" in m.get("output_modalities", ()),
+    "embedding": lambda m: "embeddings" in m.get("output_modalities", ()),
+    "tools": lambda m: "tools" in m.get("supported_parameters", ()),
+    "long_context": lambda m: (m.get("context_length") or 0) >= 100_000,
+}
+
+
+def _dumps(payload: dict | None) -> bytes:
+    """Serialize a request payload to JSON bytes once, ahead of any retries."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _error_details(payload: dict, default_code, fallback: str) -> tuple:
+    """Return (code, message) from an error body.
+
+    "error" may be an object with code/message, or a bare string.
+    """
+    error = payload.get("error")
+    if isinstance(error, str):
+        return default_code, error
+    error = error if isinstance(error, dict) else {}
+    code = error.get("code", default_code)
+    message = error.get("message") or payload.get("message") or fallback
+    return code, message
+
+
+def _build_messages(prompt: str, system: str | None = None) -> list[dict]:
+    """Return the messages for a single user prompt, with optional system prompt."""
+    if system:
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ]
+    return [{"role": "user", "content": prompt}]
+
+
+def parse_data_url(data_url: str) -> tuple[str, str]:
+    """Split a base64 data URL into its MIME type and payload.
+
+    Only the short header before the first comma is scanned, so the (possibly
+    multi-megabyte) payload is sliced out once rather than re-split.
+
+    Returns:
+        Tuple of (mime_type, base64_payload), e.g. ("image/png", "iVBOR...")
+    """
+    header, _, payload = data_url.partition(",")
+    mime_type = header.partition(":")[2].partition(";")[0]
+    return mime_type, payload
+
+
+def _write_base64(data: str, fh: BinaryIO, chunk_size: int = _DECODE_CHUNK) -> None:
+    """Decode base64 text into fh one slice at a time.
+
+    Only one slice's worth of decoded bytes is held in memory, rather than
+    the whole image.
+    """
+    for start in range(0, len(data), chunk_size):
+        fh.write(binascii.a2b_base64(data[start : start + chunk_size]))
+
+
+def _write_base64_image(chunks: Iterable[bytes], fh: BinaryIO) -> str | None:
+    """Decode the first base64 image data URL in a streamed JSON body into fh.
 
-import requests
+    Only a small carry-over buffer is kept between chunks, so the base64
+    payload is never held in memory as a whole.
+
+    Returns:
+        The image MIME type (e.g., "image/png"), or None if no image was found
+    """
+    buffer = b""
+    mime_type = None
+    for chunk in chunks:
+        buffer += chunk
+        if mime_type is None:
+            match = _IMAGE_DATA_URL.search(buffer)
+            if match is None:
+                buffer = buffer[-_HEADER_LOOKBACK:]
+                continue
+            mime_type = "image/" + match.group(1).decode("ascii")
+            buffer = buffer[match.end() :]
+
+        # JSON encoders may escape "/" as "\/"; a trailing backslash waits for
+        # the next chunk so the escape is never split.
+        end = buffer.find(b'"')
+        data = (buffer if end == -1 else buffer[:end]).replace(b"\\/", b"/")
+        if end != -1:
+            fh.write(binascii.a2b_base64(data))
+            return mime_type
+
+        # Decode whole 4-character groups straight from a view of the buffer
+        size = len(data) - data.endswith(b"\\")
+        usable = size - size % 4
+        fh.write(binascii.a2b_base64(memoryview(data)[:usable]))
+        buffer = data[usable:]
+
+    if mime_type is not None:
+        raise Exception("Image data ended unexpectedly")
+    return None
+
+
+def _interned(values: Iterable[str]) -> list[str]:
+    """Return values as a list of interned strings.
+
+    Modality and parameter names repeat across hundreds of catalog entries;
+    interning lets every cached model share one copy of each.
+    """
+    return [sys.intern(v) if isinstance(v, str) else v for v in values]
 
 
 class OpenRouterClient:
@@ -14,19 +158,91 @@ class OpenRouterClient:
     BASE_URL = "https://openrouter.ai/api/v1"
     APP_URL = "https://github.com/tsilva/mcp-openrouter"
     APP_TITLE = "mcp-openrouter"
-
-    def __init__(self, api_key: str):
+    MODELS_CACHE_TTL = 300.0
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+    RETRY_JITTER = 0.5
+    # Requests chat_many keeps in flight at once
+    BATCH_CONCURRENCY = 4
+    # Longest server Retry-After worth waiting for inside a tool call
+    RETRY_AFTER_MAX_DELAY = 60.0
+    CAPABILITIES = tuple(_CAPABILITY_FILTERS)
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        sleep_fn: Callable[[float], None] | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ):
         """Initialize the client with an API key.
 
         Args:
             api_key: OpenRouter API key from https://openrouter.ai/keys
+            sleep_fn: Called with the delay (seconds) between retries;
+                defaults to time.sleep
+            transport: Custom httpx transport for synchronous requests (e.g.
+                httpx.MockTransport in tests); bypasses environment proxies
         """
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, br",
             "HTTP-Referer": self.APP_URL,
             "X-Title": self.APP_TITLE,
         }
+        # Reuse (and multiplex, over HTTP/2) connections to openrouter.ai.
+        options = self._http_options()
+        if transport is not None:
+            options["transport"] = transport
+        self._client = httpx.Client(**options)
+        self._sleep = sleep_fn or time.sleep
+        self._aclient: httpx.AsyncClient | None = None
+        self._models_cache: tuple[float, list[dict]] | None = None
+        self._by_capability: dict[str, list[dict]] = {}
+        self._search_keys: list[tuple[str, str, dict]] = []
+        self._models_lock = threading.Lock()
+
+    def _http_options(self) -> dict:
+        """Return shared settings for the sync and async HTTP clients."""
+        return {
+            "base_url": self.BASE_URL,
+            "headers": self.headers,
+            "http2": True,
+            "timeout": 120.0,
+            "limits": httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        }
+
+    def close(self) -> None:
+        """Close pooled HTTP connections, including the async client's."""
+        self._client.close()
+        aclient, self._aclient = self._aclient, None
+        if aclient is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside a loop (e.g. at exit). Connections tied to a loop
+            # that has since closed cannot be shut down gracefully.
+            with contextlib.suppress(RuntimeError):
+                asyncio.run(aclient.aclose())
+        else:
+            task = loop.create_task(aclient.aclose())
+            _closing_tasks.add(task)
+            task.add_done_callback(_closing_tasks.discard)
+
+    async def aclose(self) -> None:
+        """Close the async HTTP client, if one was created."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Return the async HTTP client, creating it on first use."""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(**self._http_options())
+        return self._aclient
 
     def _request(
         self,
@@ -35,72 +251,183 @@ class OpenRouterClient:
         payload: dict | None = None,
         *,
         params: dict | None = None,
-        max_retries: int = 3,
+        max_retries: int = MAX_RETRIES,
     ):
         """Make API request with retry logic."""
-        url = endpoint if endpoint.startswith("http") else f"{self.BASE_URL}/{endpoint}"
-
+        body = _dumps(payload) if method != "GET" else None
         for attempt in range(max_retries):
             try:
                 if method == "GET":
-                    response = requests.get(
-                        url,
-                        headers=self.headers,
-                        params=params,
-                        timeout=120,
-                    )
+                    response = self._client.get(endpoint, params=params)
                 else:
-                    response = requests.post(
-                        url, headers=self.headers, json=payload, timeout=120
-                    )
+                    response = self._client.post(endpoint, content=body)
 
                 if response.status_code == 200:
-                    return response.json()
-
-                code, message = self._parse_error_response(response)
-
-                # Retryable errors
-                if code in [408, 429, 502, 503] and attempt < max_retries - 1:
-                    wait = min(2**attempt * 2, 30)
-                    print(
-                        f"Retrying in {wait}s (attempt {attempt + 1}/{max_retries})...",
-                        file=sys.stderr,
-                    )
-                    time.sleep(wait)
+                    return orjson.loads(response.content)
+
+                self._sleep(self._retry_wait(response, attempt, max_retries))
+
+            except httpx.TimeoutException:
+                if attempt < max_retries - 1:
+                    continue
+                raise Exception("Request timed out after retries")
+            except httpx.ConnectError as e:
+                self._sleep(self._connect_retry_wait(e, attempt, max_retries))
+            except httpx.RequestError as e:
+                raise Exception(f"Network error: {e}")
+
+        raise Exception("Max retries exceeded")
+
+    @contextlib.contextmanager
+    def _open_stream(
+        self,
+        endpoint: str,
+        payload: dict,
+        *,
+        max_retries: int = MAX_RETRIES,
+    ) -> Iterator[httpx.Response]:
+        """Open a streaming POST request with retry logic.
+
+        Retries only happen before the successful response is handed over;
+        errors while its body is being read are raised, not retried.
+        """
+        body = _dumps(payload)
+        for attempt in range(max_retries):
+            streaming = False
+            try:
+                with self._client.stream("POST", endpoint, content=body) as response:
+                    if response.status_code == 200:
+                        streaming = True
+                        yield response
+                        return
+                    response.read()
+                    wait = self._retry_wait(response, attempt, max_retries)
+                self._sleep(wait)
+
+            except httpx.TimeoutException:
+                if not streaming and attempt < max_retries - 1:
                     continue
+                raise Exception("Request timed out after retries")
+            except httpx.ConnectError as e:
+                if streaming:
+                    raise Exception(f"Network error: {e}")
+                self._sleep(self._connect_retry_wait(e, attempt, max_retries))
+            except httpx.RequestError as e:
+                raise Exception(f"Network error: {e}")
+
+        raise Exception("Max retries exceeded")
+
+    async def _arequest(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict | None = None,
+        *,
+        params: dict | None = None,
+        max_retries: int = MAX_RETRIES,
+    ):
+        """Make an async API request with the same retry logic as _request."""
+        aclient = self._async_client()
+        body = _dumps(payload) if method != "GET" else None
+        for attempt in range(max_retries):
+            try:
+                if method == "GET":
+                    response = await aclient.get(endpoint, params=params)
+                else:
+                    response = await aclient.post(endpoint, content=body)
+
+                if response.status_code == 200:
+                    return orjson.loads(response.content)
 
-                # Non-retryable errors
-                error_messages = {
-                    400: "Bad request - check parameters",
-                    401: "Invalid API key - check OPENROUTER_API_KEY",
-                    402: "Insufficient credits - add funds at openrouter.ai",
-                    403: "Content flagged by moderation",
-                    429: "Rate limited - wait before retrying",
-                }
-                msg = error_messages.get(code, message)
-                raise Exception(f"OpenRouter error {code}: {msg}")
-
-            except requests.exceptions.Timeout:
+                await asyncio.sleep(self._retry_wait(response, attempt, max_retries))
+
+            except httpx.TimeoutException:
                 if attempt < max_retries - 1:
                     continue
                 raise Exception("Request timed out after retries")
-            except requests.exceptions.RequestException as e:
+            except httpx.ConnectError as e:
+                await asyncio.sleep(self._connect_retry_wait(e, attempt, max_retries))
+            except httpx.RequestError as e:
                 raise Exception(f"Network error: {e}")
 
         raise Exception("Max retries exceeded")
 
+    def _retry_wait(self, response, attempt: int, max_retries: int) -> float:
+        """Return seconds to wait before retrying, or raise if not retryable."""
+        code, message = self._parse_error_response(response)
+
+        # Retryable errors: jittered exponential backoff, never sooner than
+        # the server's Retry-After hint
+        if code in _RETRYABLE_CODES and attempt < max_retries - 1:
+            retry_after = self._retry_after(response)
+            if retry_after > self.RETRY_AFTER_MAX_DELAY:
+                # Waiting that long would stall the tool call; fail now instead
+                msg = _ERROR_MESSAGES.get(code, message)
+                raise Exception(
+                    f"OpenRouter error {code}: {msg} (retry after {retry_after:.0f}s)"
+                )
+            wait = max(retry_after, self._backoff(attempt))
+            print(
+                f"Retrying in {wait:.1f}s (attempt {attempt + 1}/{max_retries})...",
+                file=sys.stderr,
+            )
+            return wait
+
+        # Non-retryable errors
+        msg = _ERROR_MESSAGES.get(code, message)
+        raise Exception(f"OpenRouter error {code}: {msg}")
+
+    def _connect_retry_wait(
+        self, error: httpx.ConnectError, attempt: int, max_retries: int
+    ) -> float:
+        """Return seconds to wait before reconnecting, or raise if out of attempts.
+
+        Nothing was sent when the connection failed, so retrying is always safe.
+        """
+        if attempt >= max_retries - 1:
+            raise Exception(f"Network error: {error}")
+        wait = self._backoff(attempt)
+        print(
+            f"Connection failed; retrying in {wait:.1f}s "
+            f"(attempt {attempt + 1}/{max_retries})...",
+            file=sys.stderr,
+        )
+        return wait
+
+    def _backoff(self, attempt: int) -> float:
+        """Return the jittered exponential backoff for attempt, capped."""
+        jitter = random.uniform(1 - self.RETRY_JITTER, 1 + self.RETRY_JITTER)
+        return min(self.RETRY_BASE_DELAY * 2**attempt * jitter, self.RETRY_MAX_DELAY)
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Return the Retry-After delay in seconds, or 0 if absent or invalid."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return 0.0
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
     @staticmethod
     def _parse_error_response(response) -> tuple[int, str]:
         """Extract an error code and message from JSON or plain-text responses."""
         try:
-            payload = response.json()
+            payload = orjson.loads(response.content)
         except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
             return response.status_code, response.text
 
-        error = payload.get("error", {})
-        code = error.get("code", response.status_code)
-        message = error.get("message") or payload.get("message") or response.text
-        return code, message
+        return _error_details(payload, response.status_code, response.text)
 
     def chat(self, model: str, messages: list, **kwargs) -> dict:
         """Send chat completion request.
@@ -129,14 +456,76 @@ class OpenRouterClient:
         Returns:
             Response text content
         """
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
-
-        result = self.chat(model, messages, **kwargs)
+        result = self.chat(model, _build_messages(prompt, system), **kwargs)
         return result["choices"][0]["message"]["content"]
 
+    def chat_stream(self, model: str, messages: list, **kwargs) -> Iterator[str]:
+        """Stream a chat completion, yielding text as it is generated.
+
+        Args:
+            model: Model identifier (e.g., "anthropic/claude-sonnet-4")
+            messages: List of message dicts with 'role' and 'content' keys
+            **kwargs: Additional parameters (max_tokens, temperature, etc.)
+
+        Yields:
+            Response text deltas, in order
+        """
+        payload = {"model": model, "messages": messages}
+        payload.update(kwargs)
+        payload["stream"] = True
+
+        with self._open_stream("chat/completions", payload) as response:
+            for line in response.iter_lines():
+                # Skip blank separators and ": OPENROUTER PROCESSING" comments
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    return
+
+                chunk = orjson.loads(data)
+                if chunk.get("error"):
+                    code, message = _error_details(chunk, None, data)
+                    if isinstance(code, int):
+                        raise Exception(f"OpenRouter error {code}: {message}")
+                    raise Exception(f"OpenRouter stream error: {message}")
+                for choice in chunk.get("choices") or ():
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
+    async def chat_many(
+        self, model: str, prompts: list[str], system: str = None, **kwargs
+    ) -> list[str]:
+        """Send several prompts concurrently - returns response texts in order.
+
+        At most BATCH_CONCURRENCY requests are in flight at once. The batch is
+        all-or-nothing: if any prompt fails after retries, that error is raised
+        and the other responses are discarded.
+
+        Args:
+            model: Model identifier (e.g., "anthropic/claude-sonnet-4")
+            prompts: User messages to send, one completion per prompt
+            system: Optional system prompt shared by every request
+            **kwargs: Additional parameters (max_tokens, temperature, etc.)
+
+        Returns:
+            Response text content for each prompt
+        """
+        payloads = [
+            {"model": model, "messages": _build_messages(prompt, system), **kwargs}
+            for prompt in prompts
+        ]
+
+        limit = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def send(payload: dict) -> dict:
+            async with limit:
+                return await self._arequest("POST", "chat/completions", payload)
+
+        results = await asyncio.gather(*(send(p) for p in payloads))
+        return [result["choices"][0]["message"]["content"] for result in results]
+
     def generate_image(
         self,
         model: str,
@@ -163,6 +552,93 @@ class OpenRouterClient:
         Returns:
             List of generated images with image_url data
         """
+        payload = self._image_payload(
+            model, prompt, aspect_ratio, size, background, quality, output_format
+        )
+        result = self._request("POST", "chat/completions", payload)
+        images = result["choices"][0]["message"].get("images", [])
+
+        if output_path and images:
+            output = self._prepare_output_path(output_path)
+            for idx, img in enumerate(images):
+                _, base64_data = parse_data_url(img["image_url"]["url"])
+                if len(images) == 1:
+                    path = output
+                else:
+                    path = output.parent / f"{output.stem}_{idx}{output.suffix}"
+                with open(path, "wb") as f:
+                    _write_base64(base64_data, f)
+
+        return images
+
+    def generate_image_to_file(
+        self,
+        model: str,
+        prompt: str,
+        output_path: str,
+        aspect_ratio: str = "1:1",
+        size: str = "1K",
+        background: str = None,
+        quality: str = None,
+        output_format: str = None,
+    ) -> str:
+        """Generate an image and stream it straight to disk.
+
+        The base64 payload is decoded chunk by chunk as the response arrives,
+        so large images are never buffered in memory.
+
+        Args:
+            model: Image model (e.g., "google/gemini-3-pro-image-preview")
+            prompt: Image description
+            output_path: Path to save the image
+            aspect_ratio: Aspect ratio (1:1, 16:9, 9:16, 4:3, 3:4, 21:9)
+            size: Image size (1K, 2K, 4K)
+            background: Background setting (e.g., "transparent")
+            quality: Quality setting (e.g., "high", "medium", "low")
+            output_format: Output format (e.g., "png", "webp", "jpeg")
+
+        Returns:
+            MIME type of the saved image (e.g., "image/png")
+        """
+        payload = self._image_payload(
+            model, prompt, aspect_ratio, size, background, quality, output_format
+        )
+        output = self._prepare_output_path(output_path)
+        partial = output.with_name(output.name + ".part")
+
+        try:
+            with self._open_stream("chat/completions", payload) as response:
+                with open(partial, "wb") as f:
+                    mime_type = _write_base64_image(response.iter_bytes(), f)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+
+        if mime_type is None:
+            partial.unlink(missing_ok=True)
+            raise Exception("No image was generated")
+        partial.replace(output)
+        return mime_type
+
+    @staticmethod
+    def _prepare_output_path(output_path: str) -> Path:
+        """Return output_path as a Path, creating its parent directory if needed."""
+        output = Path(output_path)
+        if not output.parent.is_dir():
+            output.parent.mkdir(parents=True, exist_ok=True)
+        return output
+
+    @staticmethod
+    def _image_payload(
+        model: str,
+        prompt: str,
+        aspect_ratio: str,
+        size: str,
+        background: str | None,
+        quality: str | None,
+        output_format: str | None,
+    ) -> dict:
+        """Build a chat completions payload that requests one image."""
         image_config = {"aspect_ratio": aspect_ratio, "image_size": size}
 
         payload = {
@@ -180,24 +656,7 @@ class OpenRouterClient:
             payload["quality"] = quality
         if output_format:
             payload["output_format"] = output_format
-
-        result = self._request("POST", "chat/completions", payload)
-        images = result["choices"][0]["message"].get("images", [])
-
-        if output_path and images:
-            output = Path(output_path).resolve()
-            output.parent.mkdir(parents=True, exist_ok=True)
-            for idx, img in enumerate(images):
-                data_url = img["image_url"]["url"]
-                base64_data = data_url.split(",")[1]
-                if len(images) == 1:
-                    path = output
-                else:
-                    path = output.parent / f"{output.stem}_{idx}{output.suffix}"
-                with open(path, "wb") as f:
-                    f.write(base64.b64decode(base64_data))
-
-        return images
+        return payload
 
     @staticmethod
     def _model_identifier(model: dict) -> str | None:
@@ -208,7 +667,7 @@ class OpenRouterClient:
     def _input_modalities(model: dict) -> list[str]:
         """Return normalized input modalities."""
         architecture = model.get("architecture") or {}
-        return list(
+        return _interned(
             model.get("input_modalities")
             or architecture.get("input_modalities")
             or []
@@ -218,7 +677,7 @@ class OpenRouterClient:
     def _output_modalities(model: dict) -> list[str]:
         """Return normalized output modalities."""
         architecture = model.get("architecture") or {}
-        return list(
+        return _interned(
             model.get("output_modalities")
             or architecture.get("output_modalities")
             or []
@@ -236,18 +695,26 @@ class OpenRouterClient:
             "name": model.get("name", slug),
             "context_length": model.get("context_length"),
             "pricing": dict(model.get("pricing") or {}),
-            "supported_parameters": list(model.get("supported_parameters") or []),
+            "supported_parameters": _interned(model.get("supported_parameters") or []),
             "input_modalities": cls._input_modalities(model),
             "output_modalities": cls._output_modalities(model),
         }
 
-    def _fetch_models(self, output_modality: str | None = None) -> list[dict]:
-        """Fetch and normalize models from the public OpenRouter API."""
+    def _fetch_models(
+        self, output_modality: str | None = None, exclude: Container[str] = ()
+    ) -> list[dict]:
+        """Fetch and normalize models from the public OpenRouter API.
+
+        Models whose identifier is in ``exclude`` are skipped before they are
+        normalized, so merging overlapping listings never copies them twice.
+        """
         params = {"output_modalities": output_modality} if output_modality else None
         result = self._request("GET", "models", params=params)
         models = result.get("data", [])
         normalized: list[dict] = []
         for model in models:
+            if self._model_identifier(model) in exclude:
+                continue
             item = self._normalize_model(model)
             if item is not None:
                 normalized.append(item)
@@ -256,38 +723,59 @@ class OpenRouterClient:
     @staticmethod
     def _filter_models(models: list[dict], capability: str | None) -> list[dict]:
         """Filter normalized models by capability."""
-        if capability == "vision":
-            return [m for m in models if "image" in m.get("input_modalities", [])]
-        if capability == "image_gen":
-            return [m for m in models if "image" in m.get("output_modalities", [])]
-        if capability == "embedding":
-            return [m for m in models if "embeddings" in m.get("output_modalities", [])]
-        if capability == "tools":
-            return [m for m in models if "tools" in m.get("supported_parameters", [])]
-        if capability == "long_context":
-            return [m for m in models if m.get("context_length", 0) >= 100000]
+        predicate = _CAPABILITY_FILTERS.get(capability)
+        if predicate is None:
+            return models
+        return [m for m in models if predicate(m)]
+
+    def refresh_models(self) -> list[dict]:
+        """Fetch the merged model catalog and replace the cached copy.
+
+        Returns:
+            List of normalized model dicts across text, image, and embedding models
+        """
+        merged: dict[str, dict] = {}
+        for modality in (None, "image", "embeddings"):
+            for model in self._fetch_models(modality, exclude=merged):
+                merged.setdefault(model["slug"], model)
+
+        models = list(merged.values())
+        by_capability = {
+            capability: self._filter_models(models, capability)
+            for capability in self.CAPABILITIES
+        }
+        search_keys = [(m["slug"].lower(), m["name"].lower(), m) for m in models]
+        with self._models_lock:
+            self._models_cache = (time.monotonic(), models)
+            self._by_capability = by_capability
+            self._search_keys = search_keys
         return models
 
+    def _cached_models(self) -> list[dict]:
+        """Return the model catalog, refreshing it once the cache TTL expires."""
+        with self._models_lock:
+            cached = self._models_cache
+        if cached is not None and time.monotonic() - cached[0] < self.MODELS_CACHE_TTL:
+            return cached[1]
+        return self.refresh_models()
+
     def list_models(self, capability: str = None) -> list:
         """List available models, optionally filtered by capability.
 
+        The merged catalog and its per-capability views are cached for
+        MODELS_CACHE_TTL seconds.
+
         Args:
             capability: Filter by capability (vision, image_gen, tools, long_context)
 
         Returns:
             List of model dicts with slug, name, context_length, pricing, etc.
+            Each dict is a shallow copy, so callers may modify it freely.
         """
-        if capability == "image_gen":
-            return self._filter_models(self._fetch_models("image"), capability)
-        if capability == "embedding":
-            return self._filter_models(self._fetch_models("embeddings"), capability)
-
-        merged: dict[str, dict] = {}
-        for modality in (None, "image", "embeddings"):
-            for model in self._fetch_models(modality):
-                merged.setdefault(model["slug"], model)
-
-        return self._filter_models(list(merged.values()), capability)
+        models = self._cached_models()
+        with self._models_lock:
+            by_capability = self._by_capability
+        return [dict(m) for m in by_capability.get(capability, models)]
 
     def embeddings(self, model: str, input: str | list[str], **kwargs) -> dict:
         """Generate embeddings for text input.
@@ -304,19 +792,24 @@ class OpenRouterClient:
         payload.update(kwargs)
         return self._request("POST", "embeddings", payload)
 
-    def find_model(self, search_term: str) -> list:
+    def find_model(self, search_term: str, limit: int | None = None) -> list:
         """Find models matching search term.
 
         Args:
             search_term: Text to search for in model names/slugs
+            limit: Stop after this many matches (all matches if None)
 
         Returns:
-            List of matching model dicts
+            List of matching model dicts (shallow copies of the cache)
         """
-        models = self.list_models()
+        self._cached_models()
+        with self._models_lock:
+            search_keys = self._search_keys
+
         search_lower = search_term.lower()
-        return [
-            m
-            for m in models
-            if search_lower in m["slug"].lower() or search_lower in m["name"].lower()
-        ]
+        matches = (
+            dict(model)
+            for slug_lower, name_lower, model in search_keys
+            if search_lower in slug_lower or search_lower in name_lower
+        )
+        return list(itertools.islice(matches, limit))
@@ -4,8 +4,10 @@ Exposes OpenRouter API capabilities as MCP tools for text completion,
 image generation, and model discovery.
 """
 
-import base64
+import atexit
+import binascii
 import os
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -13,9 +15,12 @@ from dotenv import load_dotenv
 from fastmcp import FastMCP
 from fastmcp.utilities.types import Image
 
-from mcp_openrouter.client import OpenRouterClient
+from mcp_openrouter.client import OpenRouterClient, parse_data_url
 from mcp_openrouter.config import get_default_model
 
+_env_loaded = False
+_env_lock = threading.Lock()
+
 
 def _load_env_files() -> None:
     """Load environment variables from the working tree and current directory."""
@@ -31,7 +36,23 @@ def _load_env_files() -> None:
         load_dotenv(resolved_path)
 
 
-_load_env_files()
+def ensure_env() -> None:
+    """Load .env files once, on first use rather than at import time."""
+    global _env_loaded
+
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            _load_env_files()
+            _env_loaded = True
+
+
+def _default_model(category: str) -> Optional[str]:
+    """Return the configured default model, loading .env files first."""
+    ensure_env()
+    return get_default_model(category)
+
 
 # Initialize FastMCP server
 mcp = FastMCP(
@@ -40,6 +61,7 @@ mcp = FastMCP(
 
 Available tools:
 - chat: Text completion with any model
+- chat_batch: Concurrent text completions for several prompts
 - generate_image: Image generation with image models
 - embed: Generate embeddings with embedding models
 - list_models: List available models by capability
@@ -55,15 +77,48 @@ def _register_tool(fn, *, name: str):
     return fn
 
 
+_client: Optional[OpenRouterClient] = None
+_client_key: Optional[str] = None
+_client_lock = threading.Lock()
+
+
 def get_client() -> OpenRouterClient:
-    """Get an initialized OpenRouter client."""
+    """Get the shared OpenRouter client, creating it on first use.
+
+    The client is reused across tool calls so its connection pool stays warm.
+    It is rebuilt only if OPENROUTER_API_KEY changes.
+    """
+    global _client, _client_key
+
+    ensure_env()
     api_key = os.environ.get("OPENROUTER_API_KEY")
     if not api_key:
         raise ValueError(
             "OPENROUTER_API_KEY environment variable not set. "
             "Get your key at: https://openrouter.ai/keys"
         )
-    return OpenRouterClient(api_key)
+
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            if _client is not None:
+                _client.close()
+            _client = OpenRouterClient(api_key)
+            _client_key = api_key
+        return _client
+
+
+def reset_client() -> None:
+    """Close and discard the shared OpenRouter client."""
+    global _client, _client_key
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_key = None
+
+
+atexit.register(reset_client)
 
 
 def _chat(
@@ -117,7 +172,7 @@ def _chat(
     if not prompt and not messages:
         raise ValueError("Either 'prompt' or 'messages' must be provided.")
 
-    resolved_model = model or get_default_model("text")
+    resolved_model = model or _default_model("text")
     if not resolved_model:
         raise ValueError(
             "No model specified. Either pass the 'model' parameter or set "
@@ -176,6 +231,53 @@ def _chat(
 chat = _register_tool(_chat, name="chat")
 
 
+async def _chat_batch(
+    prompts: list[str],
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+) -> list[str]:
+    """Send several independent prompts to an OpenRouter model concurrently.
+
+    A few requests run at a time. If any prompt fails, the whole batch fails
+    and no responses are returned.
+
+    Args:
+        prompts: User messages to send; each one gets its own completion
+        model: Model identifier (e.g., "anthropic/claude-sonnet-4").
+            If not specified, uses DEFAULT_TEXT_MODEL environment variable.
+        system: Optional system prompt shared by every request
+        max_tokens: Maximum tokens per response (model default if not specified)
+        temperature: Sampling temperature 0-2 (model default if not specified)
+
+    Returns:
+        The model's response text for each prompt, in the same order
+    """
+    if not prompts:
+        raise ValueError("'prompts' must contain at least one prompt.")
+
+    resolved_model = model or _default_model("text")
+    if not resolved_model:
+        raise ValueError(
+            "No model specified. Either pass the 'model' parameter or set "
+            "DEFAULT_TEXT_MODEL environment variable."
+        )
+
+    client = get_client()
+
+    kwargs = {}
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+
+    return await client.chat_many(resolved_model, prompts, system=system, **kwargs)
+
+
+chat_batch = _register_tool(_chat_batch, name="chat_batch")
+
+
 def _generate_image(
     prompt: str,
     model: Optional[str] = None,
@@ -185,7 +287,7 @@ def _generate_image(
     quality: Optional[str] = None,
     output_format: Optional[str] = None,
     output_path: Optional[str] = None,
-) -> Image:
+) -> Image | str:
     """Generate an image using an OpenRouter image generation model.
 
     Args:
@@ -199,19 +301,38 @@ def _generate_image(
         output_format: Output format (e.g., "png", "webp", "jpeg")
         output_path: Optional absolute file path to save the image.
             Must be an absolute path if provided (e.g., "/Users/name/output.png").
+            When set, the image is streamed to disk and only a confirmation
+            message is returned.
 
     Returns:
-        The generated image data
+        The generated image data, or a confirmation message when saved to disk
     """
-    resolved_model = model or get_default_model("image")
+    resolved_model = model or _default_model("image")
     if not resolved_model:
         raise ValueError(
             "No model specified. Either pass the 'model' parameter or set "
             "DEFAULT_IMAGE_MODEL environment variable."
         )
 
+    if output_path and not Path(output_path).is_absolute():
+        raise ValueError(f"output_path must be an absolute path, got: {output_path}")
+
     client = get_client()
 
+    # Stream straight to disk so large images are never buffered in memory
+    if output_path:
+        mime_type = client.generate_image_to_file(
+            resolved_model,
+            prompt,
+            output_path,
+            aspect_ratio=aspect_ratio,
+            size=size,
+            background=background,
+            quality=quality,
+            output_format=output_format,
+        )
+        return f"Saved {mime_type} image to {output_path}"
+
     images = client.generate_image(
         resolved_model,
         prompt,
@@ -225,28 +346,12 @@ def _generate_image(
     if not images:
         raise ValueError("No image was generated. Try adjusting the prompt or model.")
 
-    # Extract base64 data from the response
-    data_url = images[0]["image_url"]["url"]
-    base64_data = data_url.split(",")[1]
+    # Split the data URL (e.g., "data:image/png;base64,...") into format and data
+    mime_type, base64_data = parse_data_url(images[0]["image_url"]["url"])
+    img_format = mime_type.partition("/")[2]  # "png", "webp", etc.
 
-    # Determine format from data URL (e.g., "data:image/png;base64,...")
-    mime_type = data_url.split(";")[0].split(":")[1]
-    img_format = mime_type.split("/")[1]  # "png", "webp", etc.
-
-    # Decode image data
-    image_data = base64.b64decode(base64_data)
-
-    # Save to file if output_path is provided
-    if output_path:
-        path = Path(output_path)
-        if not path.is_absolute():
-            raise ValueError(
-                f"output_path must be an absolute path, got: {output_path}"
-            )
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_bytes(image_data)
-
-    return Image(data=image_data, format=img_format)
+    # a2b_base64 reads the ASCII payload in place instead of re-encoding it first
+    return Image(data=binascii.a2b_base64(base64_data), format=img_format)
 
 
 generate_image = _register_tool(_generate_image, name="generate_image")
@@ -270,7 +375,7 @@ def _embed(
     Returns:
         Embedding response with data array containing embedding vectors and usage info
     """
-    resolved_model = model or get_default_model("embedding")
+    resolved_model = model or _default_model("embedding")
     if not resolved_model:
         raise ValueError(
             "No model specified. Either pass the 'model' parameter or set "
@@ -291,6 +396,23 @@ def _embed(
 embed = _register_tool(_embed, name="embed")
 
 
+_NO_PRICING: dict = {}
+
+
+def _simplify_model(model: dict) -> dict:
+    """Return the slug, name, context length, and token pricing of a model."""
+    pricing = model.get("pricing") or _NO_PRICING
+    return {
+        "slug": model["slug"],
+        "name": model["name"],
+        "context_length": model.get("context_length"),
+        "pricing": {
+            "prompt": pricing.get("prompt"),
+            "completion": pricing.get("completion"),
+        },
+    }
+
+
 def _list_models(capability: Optional[str] = None) -> list[dict]:
     """List available OpenRouter models, optionally filtered by capability.
 
@@ -309,23 +431,15 @@ def _list_models(capability: Optional[str] = None) -> list[dict]:
     models = client.list_models(capability)
 
     # Return simplified model info
-    return [
-        {
-            "slug": m["slug"],
-            "name": m["name"],
-            "context_length": m.get("context_length"),
-            "pricing": {
-                "prompt": m.get("pricing", {}).get("prompt"),
-                "completion": m.get("pricing", {}).get("completion"),
-            },
-        }
-        for m in models
-    ]
+    return [_simplify_model(m) for m in models]
 
 
 list_models = _register_tool(_list_models, name="list_models")
 
 
+FIND_MODELS_LIMIT = 20
+
+
 def _find_models(search_term: str) -> list[dict]:
     """Search for models by name or slug.
 
@@ -336,16 +450,16 @@ def _find_models(search_term: str) -> list[dict]:
         List of matching models (max 20) with slug, name, and context_length
     """
     client = get_client()
-    matches = client.find_model(search_term)
+    matches = client.find_model(search_term, limit=FIND_MODELS_LIMIT)
 
-    # Return simplified model info, limited to 20 results
+    # Return simplified model info; find_model already stops at the limit
     return [
         {
             "slug": m["slug"],
             "name": m["name"],
             "context_length": m.get("context_length"),
         }
-        for m in matches[:20]
+        for m in matches
     ]
 
 
@@ -354,6 +468,7 @@ find_models = _register_tool(_find_models, name="find_models")
 
 def main():
     """Run the MCP server."""
+    ensure_env()
     mcp.run()
 
 
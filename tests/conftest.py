@@ -0,0 +1,44 @@
+"""Shared pytest fixtures."""
+
+import base64
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _skip_dotenv(request, monkeypatch):
+    """Keep .env files out of offline tests, so clearing os.environ sticks."""
+    if request.node.get_closest_marker("integration") is None:
+        monkeypatch.setattr("mcp_openrouter.server._env_loaded", True)
+
+
+@pytest.fixture
+def mock_client():
+    """A stand-in OpenRouterClient; tests set return values on its methods."""
+    return MagicMock()
+
+
+@pytest.fixture
+def server_client(monkeypatch, mock_client):
+    """Route the server tools' get_client() to mock_client."""
+    monkeypatch.setattr("mcp_openrouter.server.get_client", lambda: mock_client)
+    return mock_client
+
+
+@pytest.fixture(scope="session")
+def png_b64():
+    """Base64 payload of the fake PNG used by image tests."""
+    return base64.b64encode(b"fake-image").decode()
+
+
+@pytest.fixture(scope="session")
+def image_url(png_b64):
+    """A message image entry as returned by OpenRouter."""
+    return {"image_url": {"url": f"data:image/png;base64,{png_b64}"}}
+
+
+@pytest.fixture(scope="session")
+def image_response(image_url):
+    """A chat completion carrying one image; treat as read-only."""
+    return {"choices": [{"message": {"images": [image_url]}}]}
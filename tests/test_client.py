@@ -1,17 +1,43 @@
 """Unit tests for OpenRouterClient (mocked HTTP)."""
 
+import asyncio
 import base64
-from unittest.mock import MagicMock, patch
-
+import contextlib
+import io
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import orjson
 import pytest
-import requests
 
-from mcp_openrouter.client import OpenRouterClient
+from mcp_openrouter.client import (
+    OpenRouterClient,
+    _write_base64,
+    _write_base64_image,
+    parse_data_url,
+)
+
+
+@pytest.fixture
+def sleeps():
+    """Delays requested by the client between retries."""
+    return []
 
 
 @pytest.fixture
-def client():
-    return OpenRouterClient("test-api-key")
+def client(sleeps):
+    client = OpenRouterClient("test-api-key", sleep_fn=sleeps.append)
+    yield client
+    client.close()
+
+
+def _posted_json(mock_send):
+    """Decode the JSON body passed to a patched post/stream call."""
+    return orjson.loads(mock_send.call_args.kwargs["content"])
 
 
 class TestClientInit:
@@ -20,97 +46,225 @@ class TestClientInit:
         assert client.headers["Content-Type"] == "application/json"
         assert client.headers["HTTP-Referer"] == "https://github.com/tsilva/mcp-openrouter"
         assert client.headers["X-Title"] == "mcp-openrouter"
+        assert client.headers["Accept-Encoding"] == "gzip, br"
+
+    def test_http_client_reuses_headers(self, client):
+        assert isinstance(client._client, httpx.Client)
+        assert client._client.headers["Authorization"] == "Bearer test-api-key"
+        assert client._client.headers["X-Title"] == "mcp-openrouter"
+        assert str(client._client.base_url) == "https://openrouter.ai/api/v1/"
+
+    def test_honors_proxy_environment(self, monkeypatch):
+        # A one-shot "proxy" that records the request line, then hangs up
+        server = socket.create_server(("127.0.0.1", 0))
+        server.settimeout(5)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            with conn:
+                received.append(conn.recv(1024).split(b"\r\n", 1)[0])
+
+        thread = threading.Thread(target=accept, daemon=True)
+        thread.start()
+        port = server.getsockname()[1]
+        monkeypatch.setenv("HTTPS_PROXY", f"http://127.0.0.1:{port}")
+        monkeypatch.delenv("NO_PROXY", raising=False)
+        client = OpenRouterClient("test-api-key")
+        try:
+            with pytest.raises(Exception):
+                client._request("GET", "models", max_retries=1)
+        finally:
+            client.close()
+            thread.join(timeout=5)
+            server.close()
+        assert received == [b"CONNECT openrouter.ai:443 HTTP/1.1"]
 
 
 class TestRequest:
     def test_get_success(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": []}
-        with patch("requests.get", return_value=mock_resp):
+        mock_resp = httpx.Response(200, json={"data": []})
+        with patch.object(client._client, "get", return_value=mock_resp):
             result = client._request("GET", "models")
         assert result == {"data": []}
 
     def test_post_success(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"choices": []}
-        with patch("requests.post", return_value=mock_resp):
+        mock_resp = httpx.Response(200, json={"choices": []})
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             result = client._request("POST", "chat/completions", {"model": "x"})
         assert result == {"choices": []}
-
-    @pytest.mark.parametrize("code", [429, 502, 503, 408])
+        assert mock_post.call_args.kwargs["content"] == b'{"model":"x"}'
+
+    def test_retries_reuse_serialized_body(self, client):
+        fail_resp = httpx.Response(503, json={"error": {"code": 503}})
+        ok_resp = httpx.Response(200, json={"ok": True})
+
+        with patch.object(
+            client._client, "post", side_effect=[fail_resp, ok_resp]
+        ) as mock_post, patch(
+            "mcp_openrouter.client._dumps", wraps=orjson.dumps
+        ) as mock_dumps:
+            client._request("POST", "endpoint", {"a": 1}, max_retries=2)
+        assert mock_dumps.call_count == 1
+        first, second = mock_post.call_args_list
+        assert first.kwargs["content"] is second.kwargs["content"]
+
+    @pytest.mark.parametrize("code", [429, 500, 502, 503, 504, 408])
     def test_retries_on_retryable_then_succeeds(self, client, code):
-        fail_resp = MagicMock()
-        fail_resp.status_code = code
-        fail_resp.json.return_value = {"error": {"code": code, "message": "err"}}
+        fail_resp = httpx.Response(
+            code, json={"error": {"code": code, "message": "err"}}
+        )
+
+        ok_resp = httpx.Response(200, json={"ok": True})
 
-        ok_resp = MagicMock()
-        ok_resp.status_code = 200
-        ok_resp.json.return_value = {"ok": True}
+        with patch.object(client._client, "post", side_effect=[fail_resp, ok_resp]):
+            result = client._request("POST", "endpoint", {}, max_retries=2)
+        assert result == {"ok": True}
 
-        with patch("requests.post", side_effect=[fail_resp, ok_resp]), \
-             patch("time.sleep"):
+    def test_retries_failed_connection_with_backoff(self, client, sleeps):
+        ok_resp = httpx.Response(200, json={"ok": True})
+        refused = httpx.ConnectError("Connection refused")
+
+        with patch.object(client._client, "post", side_effect=[refused, ok_resp]):
             result = client._request("POST", "endpoint", {}, max_retries=2)
         assert result == {"ok": True}
+        assert len(sleeps) == 1
+        assert sleeps[0] > 0
+
+    def test_connection_failure_after_retries(self, client, sleeps):
+        refused = httpx.ConnectError("Connection refused")
 
-    @pytest.mark.parametrize("code", [400, 401, 402, 403])
+        with patch.object(client._client, "post", side_effect=refused) as mock_post:
+            with pytest.raises(Exception, match="Network error: Connection refused"):
+                client._request("POST", "endpoint", {}, max_retries=3)
+        assert mock_post.call_count == 3
+        assert len(sleeps) == 2
+
+    @pytest.mark.parametrize("code", [400, 401, 402, 403, 404])
     def test_non_retryable_raises_immediately(self, client, code):
-        resp = MagicMock()
-        resp.status_code = code
-        resp.json.return_value = {"error": {"code": code, "message": "err"}}
+        resp = httpx.Response(code, json={"error": {"code": code, "message": "err"}})
 
-        with patch("requests.post", return_value=resp):
+        with patch.object(client._client, "post", return_value=resp):
             with pytest.raises(Exception, match=f"OpenRouter error {code}"):
                 client._request("POST", "endpoint", {}, max_retries=3)
 
+    def test_honors_retry_after_header(self, client, sleeps):
+        fail_resp = httpx.Response(
+            429,
+            headers={"Retry-After": "7"},
+            json={"error": {"code": 429, "message": "slow down"}},
+        )
+
+        ok_resp = httpx.Response(200, json={"ok": True})
+
+        with patch.object(client._client, "post", side_effect=[fail_resp, ok_resp]):
+            client._request("POST", "endpoint", {}, max_retries=2)
+        assert sleeps == [7.0]
+
+    def test_backoff_is_jittered_and_capped(self, client):
+        resp = httpx.Response(503, json={"error": {"code": 503, "message": "busy"}})
+
+        with patch("random.uniform", return_value=1.5):
+            assert client._retry_wait(resp, 0, 10) == 1.5
+            assert client._retry_wait(resp, 2, 10) == 6.0
+            assert client._retry_wait(resp, 8, 10) == 30.0
+
+    def test_retry_after_beyond_backoff_cap(self, client):
+        resp = httpx.Response(
+            429,
+            headers={"Retry-After": "45"},
+            json={"error": {"code": 429, "message": "slow down"}},
+        )
+        assert client._retry_wait(resp, 0, 3) == 45.0
+
+    @pytest.mark.parametrize("retry_after", ["86400", "Fri, 01 Jan 2100 00:00:00 GMT"])
+    def test_excessive_retry_after_raises(self, client, sleeps, retry_after):
+        resp = httpx.Response(
+            503,
+            headers={"Retry-After": retry_after},
+            json={"error": {"code": 503, "message": "down for maintenance"}},
+        )
+
+        with patch.object(client._client, "post", return_value=resp) as mock_post:
+            with pytest.raises(Exception, match="OpenRouter error 503.*retry after"):
+                client._request("POST", "endpoint", {}, max_retries=3)
+        mock_post.assert_called_once()
+        assert sleeps == []
+
+    def test_retry_after_past_http_date(self, client):
+        resp = httpx.Response(
+            429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        )
+        assert client._retry_after(resp) == 0.0
+
+    def test_retry_after_future_http_date(self, client):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=90)
+        resp = httpx.Response(429, headers={"Retry-After": format_datetime(retry_at)})
+        assert 85.0 < client._retry_after(resp) <= 90.0
+
     def test_non_json_error_uses_response_text(self, client):
-        resp = MagicMock()
-        resp.status_code = 500
-        resp.text = "upstream exploded"
-        resp.json.side_effect = ValueError("not json")
+        resp = httpx.Response(500, text="upstream exploded")
 
-        with patch("requests.post", return_value=resp):
+        with patch.object(client._client, "post", return_value=resp):
             with pytest.raises(Exception, match="upstream exploded"):
                 client._request("POST", "endpoint", {}, max_retries=1)
 
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"error": "model is down"},
+            ["model is down"],
+            {"error": None, "message": "model is down"},
+        ],
+    )
+    def test_unusual_json_error_bodies(self, client, body):
+        resp = httpx.Response(500, json=body)
+
+        with patch.object(client._client, "post", return_value=resp):
+            with pytest.raises(Exception, match="error 500: .*model is down"):
+                client._request("POST", "endpoint", {}, max_retries=1)
+
     def test_timeout_retries_then_raises(self, client):
-        with patch("requests.post", side_effect=requests.exceptions.Timeout):
+        with patch.object(
+            client._client, "post", side_effect=httpx.TimeoutException("timed out")
+        ):
             with pytest.raises(Exception, match="timed out"):
                 client._request("POST", "endpoint", {}, max_retries=2)
 
     def test_network_error_raises_immediately(self, client):
-        with patch(
-            "requests.post",
-            side_effect=requests.exceptions.ConnectionError("fail"),
-        ):
+        with patch.object(
+            client._client,
+            "post",
+            side_effect=httpx.ReadError("connection reset"),
+        ) as mock_post:
             with pytest.raises(Exception, match="Network error"):
                 client._request("POST", "endpoint", {})
+        mock_post.assert_called_once()
 
-    def test_max_retries_exceeded(self, client):
-        resp = MagicMock()
-        resp.status_code = 429
-        resp.json.return_value = {"error": {"code": 429, "message": "rate limited"}}
+    def test_max_retries_exceeded(self, client, sleeps):
+        resp = httpx.Response(
+            429, json={"error": {"code": 429, "message": "rate limited"}}
+        )
 
-        with patch("requests.post", return_value=resp), \
-             patch("time.sleep"):
+        with patch.object(client._client, "post", return_value=resp):
             with pytest.raises(Exception, match="429"):
                 client._request("POST", "endpoint", {}, max_retries=3)
+        assert len(sleeps) == 2
 
 
 class TestChat:
     def test_builds_payload(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"choices": [{"message": {"content": "hi"}}]}
+        mock_resp = httpx.Response(
+            200, json={"choices": [{"message": {"content": "hi"}}]}
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             client.chat(
                 "model/x",
                 [{"role": "user", "content": "hello"}],
                 temperature=0.5,
             )
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["model"] == "model/x"
             assert payload["messages"] == [{"role": "user", "content": "hello"}]
             assert payload["temperature"] == 0.5
@@ -118,45 +272,127 @@ class TestChat:
 
 class TestChatSimple:
     def test_returns_content(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "choices": [{"message": {"content": "response"}}]
-        }
+        mock_resp = httpx.Response(
+            200, json={"choices": [{"message": {"content": "response"}}]}
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             result = client.chat_simple("model/x", "hello")
             assert result == "response"
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["messages"] == [{"role": "user", "content": "hello"}]
 
     def test_with_system_prompt(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        mock_resp = httpx.Response(
+            200, json={"choices": [{"message": {"content": "ok"}}]}
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             client.chat_simple("model/x", "hello", system="be helpful")
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["messages"][0] == {"role": "system", "content": "be helpful"}
             assert payload["messages"][1] == {"role": "user", "content": "hello"}
 
 
+class TestChatMany:
+    def test_sends_concurrent_requests_in_order(self, client):
+        def make_resp(content):
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": content}}]}
+            )
+
+        aclient = client._async_client()
+        post = AsyncMock(side_effect=[make_resp("first"), make_resp("second")])
+        with patch.object(aclient, "post", post):
+            result = asyncio.run(
+                client.chat_many("model/x", ["a", "b"], system="sys", temperature=0)
+            )
+
+        assert result == ["first", "second"]
+        payloads = [orjson.loads(c.kwargs["content"]) for c in post.call_args_list]
+        assert [p["messages"][1]["content"] for p in payloads] == ["a", "b"]
+        assert payloads[0]["messages"][0] == {"role": "system", "content": "sys"}
+        assert payloads[0]["temperature"] == 0
+
+    def test_limits_requests_in_flight(self, client):
+        in_flight = peak = 0
+
+        async def post(endpoint, content):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            reply = {"choices": [{"message": {"content": "x"}}]}
+            return httpx.Response(200, json=reply)
+
+        with patch.object(client._async_client(), "post", post):
+            result = asyncio.run(client.chat_many("model/x", ["p"] * 10))
+
+        assert result == ["x"] * 10
+        assert peak == OpenRouterClient.BATCH_CONCURRENCY
+
+    def test_async_retries_then_succeeds(self, client):
+        fail_resp = httpx.Response(503, json={"error": {"code": 503, "message": "err"}})
+        ok_resp = httpx.Response(200, json={"ok": True})
+
+        aclient = client._async_client()
+        with patch.object(
+            aclient, "post", AsyncMock(side_effect=[fail_resp, ok_resp])
+        ), patch("asyncio.sleep", AsyncMock()):
+            result = asyncio.run(client._arequest("POST", "endpoint", {}))
+        assert result == {"ok": True}
+
+    def test_async_connect_error_backs_off(self, client):
+        ok_resp = httpx.Response(200, json={"ok": True})
+        refused = httpx.ConnectError("Connection refused")
+
+        aclient = client._async_client()
+        sleep = AsyncMock()
+        with patch.object(aclient, "post", AsyncMock(side_effect=[refused, ok_resp])):
+            with patch("asyncio.sleep", sleep):
+                result = asyncio.run(client._arequest("POST", "endpoint", {}))
+        assert result == {"ok": True}
+        assert sleep.await_args.args[0] > 0
+
+    def test_close_closes_async_client(self):
+        client = OpenRouterClient("test-api-key")
+        aclient = client._async_client()
+
+        client.close()
+        assert aclient.is_closed
+        assert client._aclient is None
+
+    def test_close_inside_event_loop(self):
+        client = OpenRouterClient("test-api-key")
+        aclient = client._async_client()
+
+        async def close_and_yield():
+            client.close()
+            await asyncio.sleep(0)
+
+        asyncio.run(close_and_yield())
+        assert aclient.is_closed
+
+
 class TestGenerateImage:
     def test_builds_payload(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "images": [{"image_url": {"url": "data:image/png;base64,AAAA"}}]
+        mock_resp = httpx.Response(
+            200,
+            json={
+                "choices": [
+                    {
+                        "message": {
+                            "images": [
+                                {"image_url": {"url": "data:image/png;base64,AAAA"}}
+                            ]
+                        }
                     }
-                }
-            ]
-        }
+                ]
+            },
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             result = client.generate_image(
                 "model/x",
                 "a cat",
@@ -164,7 +400,7 @@ class TestGenerateImage:
                 quality="high",
                 output_format="png",
             )
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["model"] == "model/x"
             assert payload["modalities"] == ["image", "text"]
             assert payload["background"] == "transparent"
@@ -172,131 +408,323 @@ class TestGenerateImage:
             assert payload["output_format"] == "png"
             assert len(result) == 1
 
-    def test_saves_to_file(self, client, tmp_path):
-        img_data = base64.b64encode(b"fake-image").decode()
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "images": [
-                            {"image_url": {"url": f"data:image/png;base64,{img_data}"}}
-                        ]
-                    }
-                }
-            ]
-        }
+    def test_saves_to_file(self, client, tmp_path, image_response):
+        mock_resp = httpx.Response(200, json=image_response)
 
         out = tmp_path / "output.png"
-        with patch("requests.post", return_value=mock_resp):
+        with patch.object(client._client, "post", return_value=mock_resp):
             client.generate_image("model/x", "a cat", output_path=str(out))
         assert out.read_bytes() == b"fake-image"
 
-    def test_multiple_images(self, client, tmp_path):
-        img_data = base64.b64encode(b"img").decode()
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "images": [
-                            {"image_url": {"url": f"data:image/png;base64,{img_data}"}},
-                            {"image_url": {"url": f"data:image/png;base64,{img_data}"}},
-                        ]
-                    }
-                }
-            ]
-        }
+    def test_skips_mkdir_for_existing_parent(self, client, tmp_path, image_response):
+        mock_resp = httpx.Response(200, json=image_response)
+
+        out = tmp_path / "output.png"
+        with patch.object(client._client, "post", return_value=mock_resp):
+            with patch("pathlib.Path.mkdir") as mkdir:
+                client.generate_image("model/x", "cat", output_path=str(out))
+        mkdir.assert_not_called()
+        assert out.read_bytes() == b"fake-image"
+
+    def test_multiple_images(self, client, tmp_path, image_url):
+        message = {"images": [image_url, image_url]}
+        mock_resp = httpx.Response(200, json={"choices": [{"message": message}]})
 
         out = tmp_path / "output.png"
-        with patch("requests.post", return_value=mock_resp):
+        with patch.object(client._client, "post", return_value=mock_resp):
             result = client.generate_image("model/x", "cats", output_path=str(out))
         assert len(result) == 2
         assert (tmp_path / "output_0.png").exists()
         assert (tmp_path / "output_1.png").exists()
 
+    def test_write_base64_in_slices(self):
+        data = base64.b64encode(bytes(range(256)) * 10).decode()
+        fh = io.BytesIO()
+        _write_base64(data, fh, chunk_size=8)
+        assert fh.getvalue() == bytes(range(256)) * 10
+
+
+class TestParseDataUrl:
+    @pytest.mark.parametrize(
+        "data_url, expected",
+        [
+            ("data:image/png;base64,AAAA", ("image/png", "AAAA")),
+            ("data:image/webp;base64,QUJD,REVG", ("image/webp", "QUJD,REVG")),
+            ("data:image/jpeg,AAAA", ("image/jpeg", "AAAA")),
+        ],
+    )
+    def test_splits_header_and_payload(self, data_url, expected):
+        assert parse_data_url(data_url) == expected
+
+
+class TestStreamedImage:
+    def _body(self, data=b"fake-image" * 50, escape_slashes=False, content=""):
+        url = f"data:image/webp;base64,{base64.b64encode(data).decode()}"
+        if escape_slashes:
+            url = url.replace("/", "\\/")
+        return (
+            f'{{"choices":[{{"message":{{"content":"{content}",'
+            '"images":[{"type":"image_url",'
+            f'"image_url":{{"url":"{url}"}}}}]}}}}]}}'
+        ).encode()
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+    def test_decodes_across_chunk_boundaries(self, chunk_size):
+        data = bytes(range(256)) * 4
+        body = self._body(data, escape_slashes=True)
+        chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+        out = io.BytesIO()
+
+        assert _write_base64_image(chunks, out) == "image/webp"
+        assert out.getvalue() == data
+
+    def test_no_image_returns_none(self):
+        out = io.BytesIO()
+        assert _write_base64_image([b'{"choices":[]}'], out) is None
+        assert out.getvalue() == b""
+
+    def test_truncated_image_raises(self):
+        body = b'"image_url":{"url":"data:image/png;base64,AAAA'
+        with pytest.raises(Exception, match="ended unexpectedly"):
+            _write_base64_image([body], io.BytesIO())
+
+    def test_escaped_slash_in_header(self):
+        out = io.BytesIO()
+        body = self._body(b"escaped", escape_slashes=True)
+        assert b"data:image\\/webp" in body
+
+        assert _write_base64_image([body], out) == "image/webp"
+        assert out.getvalue() == b"escaped"
+
+    def test_ignores_data_url_in_content(self):
+        content = (
+            "See data:image/png;base64,not-an-image! or "
+            '{\\"image_url\\":{\\"url\\":\\"data:image/png;base64,AAAA\\"}}'
+        )
+        body = self._body(b"real-image", content=content)
+        chunks = [body[i : i + 5] for i in range(0, len(body), 5)]
+        out = io.BytesIO()
+
+        assert _write_base64_image(chunks, out) == "image/webp"
+        assert out.getvalue() == b"real-image"
+
+    def _stream_response(self, status_code, body):
+        return contextlib.nullcontext(httpx.Response(status_code, content=body))
+
+    def test_generate_image_to_file(self, client, tmp_path):
+        out = tmp_path / "nested" / "cat.webp"
+        stream = self._stream_response(200, self._body())
+        with patch.object(client._client, "stream", return_value=stream) as mock_stream:
+            mime_type = client.generate_image_to_file(
+                "model/x", "a cat", str(out), quality="high"
+            )
+
+        assert mime_type == "image/webp"
+        assert out.read_bytes() == b"fake-image" * 50
+        assert not (tmp_path / "nested" / "cat.webp.part").exists()
+        payload = _posted_json(mock_stream)
+        assert payload["modalities"] == ["image", "text"]
+        assert payload["quality"] == "high"
+
+    def test_generate_image_to_file_retries(self, client, tmp_path):
+        out = tmp_path / "cat.webp"
+        responses = [
+            self._stream_response(503, b'{"error": {"code": 503, "message": "err"}}'),
+            self._stream_response(200, self._body()),
+        ]
+        with patch.object(client._client, "stream", side_effect=responses):
+            client.generate_image_to_file("model/x", "a cat", str(out))
+        assert out.read_bytes() == b"fake-image" * 50
+
+    def test_generate_image_to_file_without_image(self, client, tmp_path):
+        out = tmp_path / "cat.webp"
+        with patch.object(
+            client._client,
+            "stream",
+            return_value=self._stream_response(200, b'{"choices":[]}'),
+        ):
+            with pytest.raises(Exception, match="No image"):
+                client.generate_image_to_file("model/x", "a cat", str(out))
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestChatStream:
+    """Tests for OpenRouterClient.chat_stream."""
+
+    def _stream_response(self, lines):
+        body = "\n".join(lines).encode()
+        return contextlib.nullcontext(httpx.Response(200, content=body))
+
+    def test_chat_stream_yields_deltas(self, client):
+        stream = self._stream_response([
+            ": OPENROUTER PROCESSING",
+            "",
+            'data: {"choices":[{"delta":{"role":"assistant","content":"Hel"}}]}',
+            "",
+            'data: {"choices":[{"delta":{"content":"lo"}}]}',
+            "",
+            'data: {"choices":[{"delta":{},"finish_reason":"stop"}]}',
+            "",
+            "data: [DONE]",
+            "",
+        ])
+        messages = [{"role": "user", "content": "Hi"}]
+        with patch.object(client._client, "stream", return_value=stream) as mock_stream:
+            chunks = list(client.chat_stream("model/x", messages, max_tokens=10))
+
+        assert chunks == ["Hel", "lo"]
+        sent = orjson.loads(mock_stream.call_args.kwargs["content"])
+        assert sent["stream"] is True
+        assert sent["max_tokens"] == 10
+
+    def test_chat_stream_string_error_event(self, client):
+        stream = self._stream_response(['data: {"error":"Provider down"}'])
+        with patch.object(client._client, "stream", return_value=stream):
+            gen = client.chat_stream("model/x", [{"role": "user", "content": "Hi"}])
+            with pytest.raises(Exception) as exc_info:
+                next(gen)
+        assert str(exc_info.value) == "OpenRouter stream error: Provider down"
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ('"server_error"', "OpenRouter stream error: Provider down"),
+            ("502", "OpenRouter error 502: Provider down"),
+        ],
+    )
+    def test_chat_stream_error_event(self, client, code, expected):
+        stream = self._stream_response([
+            'data: {"choices":[{"delta":{"content":"partial"}}]}',
+            f'data: {{"error":{{"code":{code},"message":"Provider down"}}}}',
+        ])
+        with patch.object(client._client, "stream", return_value=stream):
+            gen = client.chat_stream("model/x", [{"role": "user", "content": "Hi"}])
+            assert next(gen) == "partial"
+            with pytest.raises(Exception, match=expected):
+                next(gen)
+
+
+def _arch(inputs=("text",), outputs=("text",)):
+    return {"input_modalities": list(inputs), "output_modalities": list(outputs)}
+
+
+# (capability, models) pairs where only the model with slug "a" matches.
+FILTER_CASES = [
+    (
+        "vision",
+        [
+            {"id": "a", "name": "A", "architecture": _arch(inputs=["image", "text"])},
+            {"id": "b", "name": "B", "architecture": _arch()},
+        ],
+    ),
+    (
+        "image_gen",
+        [
+            {"id": "a", "name": "A", "architecture": _arch(outputs=["image"])},
+            {"id": "b", "name": "B", "architecture": _arch()},
+        ],
+    ),
+    (
+        "tools",
+        [
+            {"slug": "a", "name": "A", "supported_parameters": ["tools"]},
+            {"slug": "b", "name": "B", "supported_parameters": []},
+        ],
+    ),
+    (
+        "long_context",
+        [
+            {"slug": "a", "name": "A", "context_length": 200000},
+            {"slug": "b", "name": "B", "context_length": 4096},
+        ],
+    ),
+]
+
 
 class TestListModels:
     def test_returns_models(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "data": [
-                {
-                    "id": "a/b",
-                    "name": "B",
-                    "context_length": 4096,
-                    "architecture": {
-                        "input_modalities": ["text"],
-                        "output_modalities": ["text"],
+        mock_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "id": "a/b",
+                        "name": "B",
+                        "context_length": 4096,
+                        "architecture": {
+                            "input_modalities": ["text"],
+                            "output_modalities": ["text"],
+                        },
+                        "supported_parameters": ["tools"],
                     },
-                    "supported_parameters": ["tools"],
-                },
-            ]
-        }
+                ]
+            },
+        )
 
-        with patch("requests.get", return_value=mock_resp):
+        with patch.object(client._client, "get", return_value=mock_resp):
             result = client.list_models()
         assert len(result) == 1
         assert result[0]["slug"] == "a/b"
 
     def test_merges_public_api_modalities(self, client):
-        text_resp = MagicMock()
-        text_resp.status_code = 200
-        text_resp.json.return_value = {
-            "data": [
-                {
-                    "id": "a/text",
-                    "name": "Text",
-                    "context_length": 4096,
-                    "architecture": {
-                        "input_modalities": ["text"],
-                        "output_modalities": ["text"],
-                    },
-                    "pricing": {},
-                    "supported_parameters": [],
-                }
-            ]
-        }
-        image_resp = MagicMock()
-        image_resp.status_code = 200
-        image_resp.json.return_value = {
-            "data": [
-                {
-                    "id": "b/image",
-                    "name": "Image",
-                    "context_length": 8192,
-                    "architecture": {
-                        "input_modalities": ["text"],
-                        "output_modalities": ["image"],
-                    },
-                    "pricing": {},
-                    "supported_parameters": [],
-                }
-            ]
-        }
-        embed_resp = MagicMock()
-        embed_resp.status_code = 200
-        embed_resp.json.return_value = {
-            "data": [
-                {
-                    "id": "c/embed",
-                    "name": "Embed",
-                    "context_length": 1024,
-                    "architecture": {
-                        "input_modalities": ["text"],
-                        "output_modalities": ["embeddings"],
-                    },
-                    "pricing": {},
-                    "supported_parameters": [],
-                }
-            ]
-        }
+        text_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "id": "a/text",
+                        "name": "Text",
+                        "context_length": 4096,
+                        "architecture": {
+                            "input_modalities": ["text"],
+                            "output_modalities": ["text"],
+                        },
+                        "pricing": {},
+                        "supported_parameters": [],
+                    }
+                ]
+            },
+        )
+        image_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "id": "b/image",
+                        "name": "Image",
+                        "context_length": 8192,
+                        "architecture": {
+                            "input_modalities": ["text"],
+                            "output_modalities": ["image"],
+                        },
+                        "pricing": {},
+                        "supported_parameters": [],
+                    }
+                ]
+            },
+        )
+        embed_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "id": "c/embed",
+                        "name": "Embed",
+                        "context_length": 1024,
+                        "architecture": {
+                            "input_modalities": ["text"],
+                            "output_modalities": ["embeddings"],
+                        },
+                        "pricing": {},
+                        "supported_parameters": [],
+                    }
+                ]
+            },
+        )
 
-        with patch(
-            "requests.get",
+        with patch.object(
+            client._client,
+            "get",
             side_effect=[text_resp, image_resp, embed_resp],
         ) as mock_get:
             result = client.list_models()
@@ -309,134 +737,143 @@ class TestListModels:
             "output_modalities": "embeddings"
         }
 
-    def test_filter_vision(self, client):
-        models = [
-            {
-                "id": "a",
-                "name": "A",
-                "architecture": {
-                    "input_modalities": ["image", "text"],
-                    "output_modalities": ["text"],
-                },
-                "supported_parameters": [],
-            },
-            {
-                "id": "b",
-                "name": "B",
-                "architecture": {
-                    "input_modalities": ["text"],
-                    "output_modalities": ["text"],
-                },
-                "supported_parameters": [],
-            },
-        ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
+    def test_overlapping_listings_normalized_once(self, client):
+        model = {"id": "a/both", "name": "Both", "input_modalities": ["text"]}
+        resp = httpx.Response(200, json={"data": [model]})
 
-        with patch("requests.get", return_value=mock_resp):
-            result = client.list_models("vision")
-        assert len(result) == 1
-        assert result[0]["slug"] == "a"
+        with patch.object(client._client, "get", return_value=resp), patch.object(
+            client, "_normalize_model", wraps=client._normalize_model
+        ) as mock_normalize:
+            result = client.list_models()
 
-    def test_filter_image_gen(self, client):
+        assert [item["slug"] for item in result] == ["a/both"]
+        assert mock_normalize.call_count == 1
+
+    def test_modalities_are_interned(self, client):
         models = [
-            {
-                "id": "a",
-                "name": "A",
-                "architecture": {
-                    "input_modalities": ["text"],
-                    "output_modalities": ["image"],
-                },
-                "supported_parameters": [],
-            },
-            {
-                "id": "b",
-                "name": "B",
-                "architecture": {
-                    "input_modalities": ["text"],
-                    "output_modalities": ["text"],
-                },
-                "supported_parameters": [],
-            },
+            {"id": f"m/{i}", "name": f"M{i}", "input_modalities": ["text"]}
+            for i in range(2)
         ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
+        resp = httpx.Response(200, json={"data": models})
 
-        with patch("requests.get", return_value=mock_resp):
-            result = client.list_models("image_gen")
-        assert len(result) == 1
+        with patch.object(client._client, "get", return_value=resp):
+            first, second = client.list_models()
+        assert first["input_modalities"][0] is second["input_modalities"][0]
 
-    def test_filter_tools(self, client):
-        models = [
-            {"slug": "a", "name": "A", "supported_parameters": ["tools"]},
-            {"slug": "b", "name": "B", "supported_parameters": []},
-        ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
+    @pytest.mark.parametrize("capability,models", FILTER_CASES)
+    def test_filter(self, client, capability, models):
+        mock_resp = httpx.Response(200, json={"data": models})
 
-        with patch("requests.get", return_value=mock_resp):
-            result = client.list_models("tools")
-        assert len(result) == 1
+        with patch.object(client._client, "get", return_value=mock_resp):
+            result = client.list_models(capability)
+        assert [m["slug"] for m in result] == ["a"]
 
-    def test_filter_long_context(self, client):
-        models = [
-            {"slug": "a", "name": "A", "context_length": 200000},
-            {"slug": "b", "name": "B", "context_length": 4096},
-        ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
 
-        with patch("requests.get", return_value=mock_resp):
-            result = client.list_models("long_context")
-        assert len(result) == 1
+class TestModelsCache:
+    def _resp(self):
+        return httpx.Response(200, json={"data": [{"slug": "a/b", "name": "B"}]})
+
+    def test_capability_views_built_once(self, client):
+        mock_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {"slug": "a", "name": "A", "supported_parameters": ["tools"]},
+                    {"slug": "b", "name": "B", "context_length": 200000},
+                ]
+            },
+        )
+        with patch.object(client._client, "get", return_value=mock_resp):
+            client.list_models()
+            with patch.object(client, "_filter_models", side_effect=AssertionError):
+                tools = client.list_models("tools")
+                long_context = client.list_models("long_context")
+        assert [m["slug"] for m in tools] == ["a"]
+        assert [m["slug"] for m in long_context] == ["b"]
+
+    def test_reuses_cached_catalog(self, client):
+        with patch.object(
+            client._client, "get", return_value=self._resp()
+        ) as mock_get:
+            client.list_models()
+            client.list_models("tools")
+            client.find_model("b")
+        assert mock_get.call_count == 3
+
+    def test_mutating_result_does_not_touch_cache(self, client):
+        with patch.object(client._client, "get", return_value=self._resp()):
+            client.list_models()[0]["name"] = "changed"
+            client.find_model("b")[0]["slug"] = "changed"
+            models = client.list_models()
+        assert models[0]["slug"] == "a/b"
+        assert models[0]["name"] == "B"
+
+    def test_refetches_after_ttl(self, client):
+        now = [0.0]
+        with patch.object(
+            client._client, "get", return_value=self._resp()
+        ) as mock_get, patch(
+            "mcp_openrouter.client.time.monotonic", lambda: now[0]
+        ):
+            client.list_models()
+            now[0] = 1.0
+            client.list_models()
+            assert mock_get.call_count == 3
+            now[0] = 1000.0
+            client.list_models()
+        assert mock_get.call_count == 6
+
+    def test_refresh_models_bypasses_cache(self, client):
+        with patch.object(
+            client._client, "get", return_value=self._resp()
+        ) as mock_get:
+            client.list_models()
+            client.refresh_models()
+        assert mock_get.call_count == 6
 
 
 class TestEmbeddings:
     def test_builds_payload(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "data": [{"object": "embedding", "embedding": [0.1, 0.2], "index": 0}],
-            "model": "mistralai/mistral-embed-2312",
-            "usage": {"prompt_tokens": 5, "total_tokens": 5},
-        }
+        mock_resp = httpx.Response(
+            200,
+            json={
+                "data": [{"object": "embedding", "embedding": [0.1, 0.2], "index": 0}],
+                "model": "mistralai/mistral-embed-2312",
+                "usage": {"prompt_tokens": 5, "total_tokens": 5},
+            },
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             result = client.embeddings("mistralai/mistral-embed-2312", "hello")
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["model"] == "mistralai/mistral-embed-2312"
             assert payload["input"] == "hello"
             assert result["data"][0]["embedding"] == [0.1, 0.2]
 
     def test_list_input(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
-            "data": [
-                {"object": "embedding", "embedding": [0.1], "index": 0},
-                {"object": "embedding", "embedding": [0.2], "index": 1},
-            ],
-            "model": "m/x",
-            "usage": {"prompt_tokens": 10, "total_tokens": 10},
-        }
+        mock_resp = httpx.Response(
+            200,
+            json={
+                "data": [
+                    {"object": "embedding", "embedding": [0.1], "index": 0},
+                    {"object": "embedding", "embedding": [0.2], "index": 1},
+                ],
+                "model": "m/x",
+                "usage": {"prompt_tokens": 10, "total_tokens": 10},
+            },
+        )
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             client.embeddings("m/x", ["hello", "world"])
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["input"] == ["hello", "world"]
 
     def test_optional_params(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": [], "model": "m/x", "usage": {}}
+        mock_resp = httpx.Response(200, json={"data": [], "model": "m/x", "usage": {}})
 
-        with patch("requests.post", return_value=mock_resp) as mock_post:
+        with patch.object(client._client, "post", return_value=mock_resp) as mock_post:
             client.embeddings("m/x", "hello", encoding_format="base64", dimensions=512)
-            payload = mock_post.call_args[1]["json"]
+            payload = _posted_json(mock_post)
             assert payload["encoding_format"] == "base64"
             assert payload["dimensions"] == 512
 
@@ -463,11 +900,9 @@ class TestListModelsEmbeddingFilter:
                 "supported_parameters": [],
             },
         ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
+        mock_resp = httpx.Response(200, json={"data": models})
 
-        with patch("requests.get", return_value=mock_resp):
+        with patch.object(client._client, "get", return_value=mock_resp):
             result = client.list_models("embedding")
         assert len(result) == 1
         assert result[0]["slug"] == "a/embed"
@@ -479,20 +914,24 @@ class TestFindModel:
             {"slug": "anthropic/Claude-Sonnet", "name": "Claude Sonnet"},
             {"slug": "openai/gpt-4", "name": "GPT-4"},
         ]
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": models}
+        mock_resp = httpx.Response(200, json={"data": models})
 
-        with patch("requests.get", return_value=mock_resp):
+        with patch.object(client._client, "get", return_value=mock_resp):
             result = client.find_model("claude")
         assert len(result) == 1
         assert result[0]["slug"] == "anthropic/Claude-Sonnet"
 
+    def test_stops_at_limit(self, client):
+        models = [{"slug": f"m/{i}", "name": f"M{i}"} for i in range(30)]
+        mock_resp = httpx.Response(200, json={"data": models})
+
+        with patch.object(client._client, "get", return_value=mock_resp):
+            result = client.find_model("m/", limit=5)
+        assert [m["slug"] for m in result] == [f"m/{i}" for i in range(5)]
+
     def test_no_matches(self, client):
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"data": [{"slug": "a/b", "name": "B"}]}
+        mock_resp = httpx.Response(200, json={"data": [{"slug": "a/b", "name": "B"}]})
 
-        with patch("requests.get", return_value=mock_resp):
+        with patch.object(client._client, "get", return_value=mock_resp):
             result = client.find_model("nonexistent")
         assert result == []
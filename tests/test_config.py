@@ -1,38 +1,28 @@
 """Unit tests for config module."""
 
-import os
-from unittest.mock import patch
+import pytest
 
 from mcp_openrouter.config import get_default_model
 
 
 class TestGetDefaultModel:
-    def test_text(self):
-        with patch.dict(
-            os.environ,
-            {"DEFAULT_TEXT_MODEL": "anthropic/claude-sonnet-4"},
-        ):
-            assert get_default_model("text") == "anthropic/claude-sonnet-4"
-
-    def test_image(self):
-        with patch.dict(os.environ, {"DEFAULT_IMAGE_MODEL": "some/model"}):
-            assert get_default_model("image") == "some/model"
-
-    def test_code(self):
-        with patch.dict(os.environ, {"DEFAULT_CODE_MODEL": "code/model"}):
-            assert get_default_model("code") == "code/model"
-
-    def test_vision(self):
-        with patch.dict(os.environ, {"DEFAULT_VISION_MODEL": "vision/model"}):
-            assert get_default_model("vision") == "vision/model"
-
-    def test_embedding(self):
-        with patch.dict(os.environ, {"DEFAULT_EMBEDDING_MODEL": "embed/model"}):
-            assert get_default_model("embedding") == "embed/model"
-
-    def test_not_set(self):
-        with patch.dict(os.environ, {}, clear=True):
-            assert get_default_model("text") is None
+    @pytest.mark.parametrize(
+        "category,env,value",
+        [
+            ("text", "DEFAULT_TEXT_MODEL", "anthropic/claude-sonnet-4"),
+            ("image", "DEFAULT_IMAGE_MODEL", "some/model"),
+            ("code", "DEFAULT_CODE_MODEL", "code/model"),
+            ("vision", "DEFAULT_VISION_MODEL", "vision/model"),
+            ("embedding", "DEFAULT_EMBEDDING_MODEL", "embed/model"),
+        ],
+    )
+    def test_reads_env(self, monkeypatch, category, env, value):
+        monkeypatch.setenv(env, value)
+        assert get_default_model(category) == value
+
+    def test_not_set(self, monkeypatch):
+        monkeypatch.delenv("DEFAULT_TEXT_MODEL", raising=False)
+        assert get_default_model("text") is None
 
     def test_unknown_category(self):
         assert get_default_model("unknown") is None
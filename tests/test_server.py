@@ -1,18 +1,23 @@
 """Unit tests for server tool functions (mocked client)."""
 
-import base64
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
+import httpx
+import orjson
 import pytest
 
+from mcp_openrouter.client import OpenRouterClient
 from mcp_openrouter.server import (
     chat,
+    chat_batch,
     embed,
     find_models,
     generate_image,
     get_client,
     list_models,
+    reset_client,
 )
 
 
@@ -20,52 +25,71 @@ def _mock_chat_response(content="response"):
     return {"choices": [{"message": {"content": content}}]}
 
 
-def _make_image_response(fmt="png", data=b"fake"):
-    b64 = base64.b64encode(data).decode()
-    return {
-        "choices": [
-            {
-                "message": {
-                    "images": [
-                        {"image_url": {"url": f"data:image/{fmt};base64,{b64}"}}
-                    ]
-                }
-            }
-        ]
-    }
+class TestGetClient:
+    def setup_method(self):
+        reset_client()
 
+    def teardown_method(self):
+        reset_client()
 
-class TestGetClient:
     def test_raises_without_api_key(self):
         with patch.dict(os.environ, {}, clear=True):
             with pytest.raises(ValueError, match="OPENROUTER_API_KEY"):
                 get_client()
 
+    def test_reuses_client(self):
+        with patch.dict(os.environ, {"OPENROUTER_API_KEY": "key-a"}):
+            assert get_client() is get_client()
+
+    def test_rebuilds_client_when_key_changes(self):
+        with patch.dict(os.environ, {"OPENROUTER_API_KEY": "key-a"}):
+            first = get_client()
+        with patch.dict(os.environ, {"OPENROUTER_API_KEY": "key-b"}):
+            second = get_client()
+        assert first is not second
+        assert second.headers["Authorization"] == "Bearer key-b"
+
+
+class TestEnvLoading:
+    def test_loads_dotenv_on_first_use(self, tmp_path, monkeypatch):
+        from mcp_openrouter import server
+
+        (tmp_path / ".env").write_text("DEFAULT_TEXT_MODEL=dotenv/model\n")
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(server, "_env_loaded", False)
+
+        with patch.dict(os.environ, {}, clear=True):
+            assert server._default_model("text") == "dotenv/model"
+            assert server._env_loaded is True
+
+    def test_loads_dotenv_only_once(self, monkeypatch):
+        from mcp_openrouter import server
+
+        monkeypatch.setattr(server, "_env_loaded", False)
+        with patch("mcp_openrouter.server._load_env_files") as mock_load:
+            server.ensure_env()
+            server.ensure_env()
+        mock_load.assert_called_once_with()
+
 
 class TestChatTool:
-    @patch("mcp_openrouter.server.get_client")
-    def test_prompt_builds_user_message(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response("hi")
-        mock_gc.return_value = client
+    def test_prompt_builds_user_message(self, server_client):
+        server_client.chat.return_value = _mock_chat_response("hi")
 
         result = chat(prompt="hello", model="m/x")
         assert result == "hi"
-        msgs = client.chat.call_args[0][1]
+        msgs = server_client.chat.call_args[0][1]
         assert msgs == [{"role": "user", "content": "hello"}]
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_messages_pass_through(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_messages_pass_through(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         conv = [
             {"role": "user", "content": "hi"},
             {"role": "assistant", "content": "hey"},
         ]
         chat(messages=conv, model="m/x")
-        msgs = client.chat.call_args[0][1]
+        msgs = server_client.chat.call_args[0][1]
         assert msgs == conv
 
     def test_raises_if_both_prompt_and_messages(self):
@@ -81,32 +105,23 @@ class TestChatTool:
             with pytest.raises(ValueError, match="No model"):
                 chat(prompt="hi")
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_system_prompt_prepended(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_system_prompt_prepended(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(prompt="hi", model="m/x", system="be nice")
-        msgs = client.chat.call_args[0][1]
+        msgs = server_client.chat.call_args[0][1]
         assert msgs[0] == {"role": "system", "content": "be nice"}
         assert msgs[1] == {"role": "user", "content": "hi"}
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_assistant_prefill_appended(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_assistant_prefill_appended(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(prompt="hi", model="m/x", assistant_prefill="Sure,")
-        msgs = client.chat.call_args[0][1]
+        msgs = server_client.chat.call_args[0][1]
         assert msgs[-1] == {"role": "assistant", "content": "Sure,"}
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_kwargs_forwarded(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_kwargs_forwarded(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(
             prompt="hi",
@@ -120,52 +135,81 @@ class TestChatTool:
             seed=42,
             stop=["END"],
         )
-        kwargs = client.chat.call_args[1]
+        kwargs = server_client.chat.call_args[1]
         assert kwargs["temperature"] == 0.5
         assert kwargs["max_tokens"] == 100
         assert kwargs["seed"] == 42
         assert kwargs["stop"] == ["END"]
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_json_mode(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_json_mode(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(prompt="hi", model="m/x", json_mode=True)
-        kwargs = client.chat.call_args[1]
+        kwargs = server_client.chat.call_args[1]
         assert kwargs["response_format"] == {"type": "json_object"}
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_response_format_overrides_json_mode(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_response_format_overrides_json_mode(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         fmt = {"type": "json_schema", "schema": {}}
         chat(prompt="hi", model="m/x", json_mode=True, response_format=fmt)
-        kwargs = client.chat.call_args[1]
+        kwargs = server_client.chat.call_args[1]
         assert kwargs["response_format"] == fmt
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_reasoning_effort(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_reasoning_effort(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(prompt="hi", model="m/x", reasoning_effort="high")
-        kwargs = client.chat.call_args[1]
+        kwargs = server_client.chat.call_args[1]
         assert kwargs["reasoning"] == {"effort": "high"}
 
-    @patch("mcp_openrouter.server.get_client")
     @patch.dict(os.environ, {"DEFAULT_TEXT_MODEL": "default/model"})
-    def test_uses_default_model(self, mock_gc):
-        client = MagicMock()
-        client.chat.return_value = _mock_chat_response()
-        mock_gc.return_value = client
+    def test_uses_default_model(self, server_client):
+        server_client.chat.return_value = _mock_chat_response()
 
         chat(prompt="hi")
-        assert client.chat.call_args[0][0] == "default/model"
+        assert server_client.chat.call_args[0][0] == "default/model"
+
+    def test_round_trip_over_http(self, monkeypatch):
+        """Replay a canned completion through the real client and httpx stack."""
+
+        def handler(request):
+            assert request.url.path == "/api/v1/chat/completions"
+            assert request.headers["Authorization"] == "Bearer test-key"
+            payload = orjson.loads(request.content)
+            assert payload["messages"] == [{"role": "user", "content": "Say 'test'"}]
+            assert payload["max_tokens"] == 10
+            return httpx.Response(200, json=_mock_chat_response("test"))
+
+        client = OpenRouterClient("test-key", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr("mcp_openrouter.server.get_client", lambda: client)
+        try:
+            result = chat(prompt="Say 'test'", model="m/x", max_tokens=10)
+        finally:
+            client.close()
+        assert result == "test"
+
+
+class TestChatBatchTool:
+    def test_forwards_prompts(self, server_client):
+        server_client.chat_many = AsyncMock(return_value=["a", "b"])
+
+        result = asyncio.run(
+            chat_batch(prompts=["one", "two"], model="m/x", system="s", max_tokens=5)
+        )
+        assert result == ["a", "b"]
+        server_client.chat_many.assert_awaited_once_with(
+            "m/x", ["one", "two"], system="s", max_tokens=5
+        )
+
+    def test_raises_on_empty_prompts(self):
+        with pytest.raises(ValueError, match="at least one"):
+            asyncio.run(chat_batch(prompts=[], model="m/x"))
+
+    def test_raises_if_no_model_and_no_default(self):
+        with patch.dict(os.environ, {}, clear=True):
+            with pytest.raises(ValueError, match="No model"):
+                asyncio.run(chat_batch(prompts=["hi"]))
 
 
 class TestGenerateImageTool:
@@ -174,54 +218,32 @@ class TestGenerateImageTool:
             with pytest.raises(ValueError, match="No model"):
                 generate_image(prompt="a cat")
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_raises_on_relative_output_path(self, mock_gc):
-        client = MagicMock()
-        client.generate_image.return_value = [
-            {
-                "image_url": {
-                    "url": "data:image/png;base64,"
-                    + base64.b64encode(b"x").decode()
-                }
-            }
-        ]
-        mock_gc.return_value = client
+    def test_raises_on_relative_output_path(self, server_client, image_url):
+        server_client.generate_image.return_value = [image_url]
 
         with pytest.raises(ValueError, match="absolute path"):
             generate_image(prompt="a cat", model="m/x", output_path="relative/path.png")
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_returns_image(self, mock_gc):
-        b64 = base64.b64encode(b"imgdata").decode()
-        client = MagicMock()
-        client.generate_image.return_value = [
-            {"image_url": {"url": f"data:image/webp;base64,{b64}"}}
-        ]
-        mock_gc.return_value = client
+    def test_returns_image(self, server_client, image_url):
+        server_client.generate_image.return_value = [image_url]
 
         result = generate_image(prompt="a cat", model="m/x")
         # Image is a fastmcp type; verify it was created (it's an Image instance)
         from fastmcp.utilities.types import Image as ImageType
         assert isinstance(result, ImageType)
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_saves_file(self, mock_gc, tmp_path):
-        b64 = base64.b64encode(b"imgdata").decode()
-        client = MagicMock()
-        client.generate_image.return_value = [
-            {"image_url": {"url": f"data:image/png;base64,{b64}"}}
-        ]
-        mock_gc.return_value = client
+    def test_streams_to_file(self, server_client, tmp_path):
+        server_client.generate_image_to_file.return_value = "image/png"
 
         out = tmp_path / "out.png"
-        generate_image(prompt="a cat", model="m/x", output_path=str(out))
-        assert out.read_bytes() == b"imgdata"
+        result = generate_image(prompt="a cat", model="m/x", output_path=str(out))
+        assert result == f"Saved image/png image to {out}"
+        args = server_client.generate_image_to_file.call_args[0]
+        assert args == ("m/x", "a cat", str(out))
+        server_client.generate_image.assert_not_called()
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_raises_when_no_images(self, mock_gc):
-        client = MagicMock()
-        client.generate_image.return_value = []
-        mock_gc.return_value = client
+    def test_raises_when_no_images(self, server_client):
+        server_client.generate_image.return_value = []
 
         with pytest.raises(ValueError, match="No image"):
             generate_image(prompt="a cat", model="m/x")
@@ -233,24 +255,19 @@ class TestEmbedTool:
             with pytest.raises(ValueError, match="No model"):
                 embed(input="hello")
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_string_input(self, mock_gc):
-        client = MagicMock()
-        client.embeddings.return_value = {
+    def test_string_input(self, server_client):
+        server_client.embeddings.return_value = {
             "data": [{"object": "embedding", "embedding": [0.1, 0.2], "index": 0}],
             "model": "m/x",
             "usage": {"prompt_tokens": 5, "total_tokens": 5},
         }
-        mock_gc.return_value = client
 
         result = embed(input="hello", model="m/x")
-        client.embeddings.assert_called_once_with("m/x", "hello")
+        server_client.embeddings.assert_called_once_with("m/x", "hello")
         assert result["data"][0]["embedding"] == [0.1, 0.2]
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_list_input(self, mock_gc):
-        client = MagicMock()
-        client.embeddings.return_value = {
+    def test_list_input(self, server_client):
+        server_client.embeddings.return_value = {
             "data": [
                 {"object": "embedding", "embedding": [0.1], "index": 0},
                 {"object": "embedding", "embedding": [0.2], "index": 1},
@@ -258,53 +275,49 @@ class TestEmbedTool:
             "model": "m/x",
             "usage": {"prompt_tokens": 10, "total_tokens": 10},
         }
-        mock_gc.return_value = client
 
         result = embed(input=["hello", "world"], model="m/x")
-        client.embeddings.assert_called_once_with("m/x", ["hello", "world"])
+        server_client.embeddings.assert_called_once_with("m/x", ["hello", "world"])
         assert len(result["data"]) == 2
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_optional_params_forwarded(self, mock_gc):
-        client = MagicMock()
-        client.embeddings.return_value = {"data": [], "model": "m/x", "usage": {}}
-        mock_gc.return_value = client
+    def test_optional_params_forwarded(self, server_client):
+        server_client.embeddings.return_value = {
+            "data": [],
+            "model": "m/x",
+            "usage": {},
+        }
 
         embed(input="hello", model="m/x", encoding_format="base64", dimensions=512)
-        client.embeddings.assert_called_once_with(
+        server_client.embeddings.assert_called_once_with(
             "m/x", "hello", encoding_format="base64", dimensions=512
         )
 
-    @patch("mcp_openrouter.server.get_client")
     @patch.dict(os.environ, {"DEFAULT_EMBEDDING_MODEL": "default/embed"})
-    def test_uses_default_model(self, mock_gc):
-        client = MagicMock()
-        client.embeddings.return_value = {
+    def test_uses_default_model(self, server_client):
+        server_client.embeddings.return_value = {
             "data": [],
             "model": "default/embed",
             "usage": {},
         }
-        mock_gc.return_value = client
 
         embed(input="hello")
-        assert client.embeddings.call_args[0][0] == "default/embed"
+        assert server_client.embeddings.call_args[0][0] == "default/embed"
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_omits_none_params(self, mock_gc):
-        client = MagicMock()
-        client.embeddings.return_value = {"data": [], "model": "m/x", "usage": {}}
-        mock_gc.return_value = client
+    def test_omits_none_params(self, server_client):
+        server_client.embeddings.return_value = {
+            "data": [],
+            "model": "m/x",
+            "usage": {},
+        }
 
         embed(input="hello", model="m/x")
         # Should only pass model and input, no extra kwargs
-        client.embeddings.assert_called_once_with("m/x", "hello")
+        server_client.embeddings.assert_called_once_with("m/x", "hello")
 
 
 class TestListModelsTool:
-    @patch("mcp_openrouter.server.get_client")
-    def test_returns_simplified(self, mock_gc):
-        client = MagicMock()
-        client.list_models.return_value = [
+    def test_returns_simplified(self, server_client):
+        server_client.list_models.return_value = [
             {
                 "slug": "a/b",
                 "name": "B",
@@ -312,34 +325,40 @@ class TestListModelsTool:
                 "pricing": {"prompt": "0.01", "completion": "0.02"},
             },
         ]
-        mock_gc.return_value = client
 
         result = list_models()
         assert len(result) == 1
         assert result[0]["slug"] == "a/b"
         assert result[0]["pricing"]["prompt"] == "0.01"
 
+    def test_missing_pricing(self, server_client):
+        server_client.list_models.return_value = [
+            {"slug": "a/b", "name": "B", "pricing": None},
+            {"slug": "c/d", "name": "D"},
+        ]
+
+        result = list_models()
+        assert [m["pricing"] for m in result] == [
+            {"prompt": None, "completion": None},
+            {"prompt": None, "completion": None},
+        ]
+
 
 class TestFindModelsTool:
-    @patch("mcp_openrouter.server.get_client")
-    def test_returns_max_20(self, mock_gc):
-        client = MagicMock()
-        client.find_model.return_value = [
+    def test_returns_max_20(self, server_client):
+        server_client.find_model.return_value = [
             {"slug": f"m/{i}", "name": f"M{i}", "context_length": 4096}
-            for i in range(30)
+            for i in range(20)
         ]
-        mock_gc.return_value = client
 
         result = find_models("m")
         assert len(result) == 20
+        assert server_client.find_model.call_args.kwargs["limit"] == 20
 
-    @patch("mcp_openrouter.server.get_client")
-    def test_simplified_format(self, mock_gc):
-        client = MagicMock()
-        client.find_model.return_value = [
+    def test_simplified_format(self, server_client):
+        server_client.find_model.return_value = [
             {"slug": "a/b", "name": "B", "context_length": 4096, "extra": "stuff"},
         ]
-        mock_gc.return_value = client
 
         result = find_models("b")
         assert set(result[0].keys()) == {"slug", "name", "context_length"}
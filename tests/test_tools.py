@@ -5,11 +5,23 @@ import os
 import pytest
 
 from mcp_openrouter.client import OpenRouterClient
+from mcp_openrouter.server import (
+    chat,
+    ensure_env,
+    find_models,
+    generate_image,
+    list_models,
+)
+
+# Live API tests. They are I/O-bound, so run them with `-n auto --dist=loadscope`
+# to spread the test classes over workers.
+pytestmark = pytest.mark.integration
 
 
 @pytest.fixture(scope="module", autouse=True)
 def require_openrouter_access():
     """Skip integration tests unless a working OpenRouter API key is available."""
+    ensure_env()
     api_key = os.environ.get("OPENROUTER_API_KEY")
     if not api_key:
         pytest.skip("OPENROUTER_API_KEY not set")
@@ -24,13 +36,17 @@ def require_openrouter_access():
         pytest.skip(f"OpenRouter integration unavailable: {exc}")
 
 
+@pytest.fixture(scope="module")
+def all_models(require_openrouter_access):
+    """The unfiltered model list, fetched once for the module."""
+    return list_models()
+
+
 class TestModelDefaults:
     """Tests for configurable model defaults."""
 
     def test_chat_uses_default_model(self, monkeypatch):
         """Chat should use default model when none specified."""
-        from mcp_openrouter.server import chat
-
         monkeypatch.setenv("DEFAULT_TEXT_MODEL", "openai/gpt-4o-mini")
 
         result = chat(prompt="Say 'test' and nothing else.", max_tokens=10)
@@ -39,8 +55,6 @@ class TestModelDefaults:
 
     def test_chat_raises_error_without_model_or_default(self, monkeypatch):
         """Chat should raise error when no model and no default configured."""
-        from mcp_openrouter.server import chat
-
         monkeypatch.delenv("DEFAULT_TEXT_MODEL", raising=False)
 
         with pytest.raises(ValueError) as exc_info:
@@ -50,8 +64,6 @@ class TestModelDefaults:
 
     def test_chat_explicit_model_overrides_default(self, monkeypatch):
         """Explicit model parameter should override the default."""
-        from mcp_openrouter.server import chat
-
         # Set a default that we won't use
         monkeypatch.setenv("DEFAULT_TEXT_MODEL", "some/other-model")
 
@@ -66,8 +78,6 @@ class TestModelDefaults:
 
     def test_generate_image_raises_error_without_model_or_default(self, monkeypatch):
         """generate_image should raise error when no model and no default configured."""
-        from mcp_openrouter.server import generate_image
-
         monkeypatch.delenv("DEFAULT_IMAGE_MODEL", raising=False)
 
         with pytest.raises(ValueError) as exc_info:
@@ -81,8 +91,6 @@ class TestChatTool:
 
     def test_chat_returns_string(self):
         """Chat should return a string response."""
-        from mcp_openrouter.server import chat
-
         # Use a fast, cheap model for testing
         result = chat(
             model="openai/gpt-4o-mini",
@@ -96,46 +104,40 @@ class TestChatTool:
 class TestListModelsTool:
     """Tests for the list_models tool."""
 
-    def test_list_models_returns_list(self):
+    def test_list_models_returns_list(self, all_models):
         """list_models should return a list of model dicts."""
-        from mcp_openrouter.server import list_models
-
-        result = list_models()
-        assert isinstance(result, list)
-        assert len(result) > 0
-        assert "slug" in result[0]
-        assert "name" in result[0]
+        assert isinstance(all_models, list)
+        assert len(all_models) > 0
+        assert "slug" in all_models[0]
+        assert "name" in all_models[0]
 
-    def test_list_models_with_capability_filter(self):
+    def test_list_models_with_capability_filter(self, all_models):
         """list_models should filter by capability."""
-        from mcp_openrouter.server import list_models
-
         result = list_models(capability="image_gen")
         assert isinstance(result, list)
         # Should have fewer results than unfiltered
-        all_models = list_models()
         assert len(result) < len(all_models)
 
 
 class TestFindModelsTool:
     """Tests for the find_models tool."""
 
-    def test_find_models_returns_matches(self):
-        """find_models should return matching models."""
-        from mcp_openrouter.server import find_models
-
-        result = find_models("claude")
+    @pytest.mark.parametrize(
+        "query,substr,fills_limit",
+        [
+            ("claude", "claude", False),  # every result should match
+            # Broad enough to fill the limit within the first few dozen models
+            ("a", None, True),
+        ],
+    )
+    def test_find_models(self, all_models, query, substr, fills_limit):
+        """find_models should return at most 20 models matching the query."""
+        result = find_models(query)
         assert isinstance(result, list)
-        assert len(result) > 0
-        # All results should contain "claude" in slug or name
-        for model in result:
-            assert (
-                "claude" in model["slug"].lower() or "claude" in model["name"].lower()
-            )
-
-    def test_find_models_limits_results(self):
-        """find_models should return at most 20 results."""
-        from mcp_openrouter.server import find_models
-
-        result = find_models("a")  # Very broad search
-        assert len(result) <= 20
+        assert 0 < len(result) <= 20
+        if fills_limit:
+            assert len(result) == 20
+        if substr:
+            for model in result:
+                searchable = f"{model['slug']} {model['name']}".lower()
+                assert substr in searchable